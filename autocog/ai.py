@@ -4,8 +4,8 @@ import time
 from typing import List, Dict, Union, Optional
 from pathlib import Path
 
-from openai import OpenAI, APIStatusError, RateLimitError
-from anthropic import Anthropic
+from .cache import Cache, cache_key
+from .retry import backoff_seconds, BACKOFF_CAP
 
 
 class AI:
@@ -24,11 +24,23 @@ class AI:
         self.history: List[Dict[str, str]] = []
         self.client = self._initialize_client()
         self.chat_history_path = chat_history_path
+        self.cache = Cache()
+        # Key of the most recent call, so callers that fail to parse a
+        # response can evict it from the cache before retrying
+        self.last_cache_key: Optional[str] = None
 
     def _initialize_client(self):
+        # The provider SDKs are imported lazily so a CLI invocation only
+        # pays the import cost of the provider it actually uses
         if self.provider == "openai":
+            from openai import OpenAI, APIStatusError, RateLimitError
+
+            self.retryable_errors = (RateLimitError, APIStatusError)
             return OpenAI(api_key=self.api_key)
         elif self.provider == "anthropic":
+            from anthropic import Anthropic, APIStatusError, RateLimitError
+
+            self.retryable_errors = (RateLimitError, APIStatusError)
             return Anthropic(api_key=self.api_key)
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
@@ -49,30 +61,59 @@ class AI:
 
         full_messages = self.history + messages
 
-        try:
-            if self.provider == "openai":
-                response = self._call_openai(full_messages, temperature)
-            elif self.provider == "anthropic":
-                response = self._call_anthropic(full_messages, temperature)
-            else:
-                raise ValueError(f"Unsupported provider: {self.provider}")
-
+        key = cache_key(self.model, self.system_prompt, full_messages, temperature)
+        self.last_cache_key = key
+        cached_response = self.cache.lookup(key, temperature)
+        if cached_response is not None:
             self.history.extend(messages)
-            self.history.append({"role": "assistant", "content": response})
-
+            self.history.append({"role": "assistant", "content": cached_response})
             self.save_chat_history()
-
-            return response
-
-        except (RateLimitError, APIStatusError) as e:
-            if "rate limit" in str(e).lower():
-                time.sleep(10)
+            return cached_response
+
+        # Bounded iterative retry on rate limits with exponential backoff,
+        # honoring the provider's Retry-After header when it sends one
+        attempts = 6
+        for attempt in range(1, attempts + 1):
+            try:
+                if self.provider == "openai":
+                    response = self._call_openai(full_messages, temperature)
+                elif self.provider == "anthropic":
+                    response = self._call_anthropic(full_messages, temperature)
+                else:
+                    raise ValueError(f"Unsupported provider: {self.provider}")
+                break
+
+            except self.retryable_errors as e:
+                if "rate limit" not in str(e).lower() or attempt == attempts:
+                    raise
+                retry_after = None
+                error_response = getattr(e, "response", None)
+                if error_response is not None:
+                    retry_after = error_response.headers.get("retry-after")
+                backoff = backoff_seconds(attempt)
+                if retry_after:
+                    try:
+                        # Clamp the header so a misbehaving provider or
+                        # proxy can't make us sleep for hours
+                        backoff = min(float(retry_after), BACKOFF_CAP * 2)
+                    except ValueError:
+                        # Retry-After may be an HTTP-date instead of
+                        # seconds; fall back to exponential backoff
+                        pass
                 print(
-                    "Exceeded rate limit, sleeping for ten seconds and retrying...",
+                    f"Exceeded rate limit, retrying in {backoff:.1f} seconds...",
                     file=sys.stderr,
                 )
-                return self.call(messages, temperature)
-            raise
+                time.sleep(backoff)
+
+        self.cache.store(key, temperature, response)
+
+        self.history.extend(messages)
+        self.history.append({"role": "assistant", "content": response})
+
+        self.save_chat_history()
+
+        return response
 
     def _call_openai(self, messages: List[Dict[str, str]], temperature: float) -> str:
         response = self.client.chat.completions.create(
@@ -82,21 +123,39 @@ class AI:
             stream=True,
         )
 
-        text = ""
+        # Accumulate in a list and join once: += on the streamed string is
+        # not guaranteed linear-time. Flushing on newlines rather than per
+        # token also cuts write syscalls for long completions
+        parts: List[str] = []
         for chunk in response:
             chunk_text = chunk.choices[0].delta.content
             if chunk_text:
-                text += chunk_text
+                parts.append(chunk_text)
                 sys.stderr.write(chunk_text)
-                sys.stderr.flush()
+                if "\n" in chunk_text:
+                    sys.stderr.flush()
 
         sys.stderr.write("\n")
-        return text
+        sys.stderr.flush()
+        return "".join(parts)
 
     def _call_anthropic(
         self, messages: List[Dict[str, str]], temperature: float
     ) -> str:
-        # Use Anthropic's beta prompt caching
+        # Use Anthropic's beta prompt caching. In addition to the static
+        # system prompt, mark the last message as a cache breakpoint so the
+        # whole conversation prefix is billed at the cached rate on the
+        # next call instead of being re-sent at full cost
+        messages = [dict(message) for message in messages]
+        last_message = messages[-1]
+        last_message["content"] = [
+            {
+                "type": "text",
+                "text": last_message["content"],
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
         response = self.client.beta.prompt_caching.messages.create(
             model=self.model,
             messages=messages,
@@ -106,16 +165,18 @@ class AI:
             stream=True,
         )
 
-        text = ""
+        parts: List[str] = []
         for event in response:
             if event.type == "content_block_delta":
                 chunk_text = event.delta.text
-                text += chunk_text
+                parts.append(chunk_text)
                 sys.stderr.write(chunk_text)
-                sys.stderr.flush()
+                if "\n" in chunk_text:
+                    sys.stderr.flush()
 
         sys.stderr.write("\n")
-        return text
+        sys.stderr.flush()
+        return "".join(parts)
 
     def clear_history(self):
         self.history = []
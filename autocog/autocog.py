@@ -1,10 +1,16 @@
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
 import sys
 import re
 import click
 import os
+import shlex
 import subprocess
+import threading
 import requests
+import tiktoken
 from packaging import version
 from pypi_simple import errors as pypi_errors
 from pypi_simple import PyPISimple
@@ -25,9 +31,39 @@ from .prompts import (
 from .retry import retry
 from .testdata import create_empty_file
 
+# One pooled session for all HTTP calls, so back-to-back requests reuse
+# the TCP+TLS connection, with automatic retries on transient 5xx errors
+session = requests.Session()
+session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=requests.adapters.Retry(
+            total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]
+        ),
+    ),
+)
+
+
+@functools.lru_cache(maxsize=1)
+def token_encoding():
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def truncate_error(error, max_tokens=2500):
+    # Truncate on real token counts rather than characters, and keep both
+    # ends: tracebacks have the entry point at the top and the exception
+    # type at the bottom, so dropping either loses diagnostic signal
+    tokens = token_encoding().encode(error)
+    if len(tokens) <= max_tokens:
+        return error
+    head = token_encoding().decode(tokens[: max_tokens // 3])
+    tail = token_encoding().decode(tokens[-2 * max_tokens // 3 :])
+    return head + "\n...[truncated]...\n" + tail
+
 
-def truncate_error(error, max_length=10000):
-    return error[:max_length]
+IMPORTANT_PATH_PATTERN = re.compile(r"predict|infer|model|main", re.IGNORECASE)
 
 
 def order_paths(
@@ -37,67 +73,86 @@ def order_paths(
     if len(paths) == 0:
         raise ValueError(f"{repo_path} has no Python files")
 
+    # For small repos all files fit in the prompt anyway, so a heuristic
+    # ordering is good enough and saves a full LLM round-trip
+    if len(paths) <= 8:
+        return sorted(
+            paths,
+            key=lambda p: (0 if IMPORTANT_PATH_PATTERN.search(str(p)) else 1, len(str(p))),
+        )
+
     print("Ordering files based on importance...", file=sys.stderr)
 
     if readme_contents is None:
         _, readme_contents = load_readme_contents(repo_path)
 
-    content = ai.call(prompts.order_paths(paths=paths, readme_contents=readme_contents))
+    # Deterministic extraction task, so call at temperature 0 and let the
+    # response cache serve it on re-runs
+    content = ai.call(
+        prompts.order_paths(paths=paths, readme_contents=readme_contents),
+        temperature=0,
+    )
 
-    ordered_paths = [Path(p) for p in content.strip().splitlines()]
-    
-    for i, path in enumerate(ordered_paths):
-        ordered_paths[i] = repo_path / path
+    ordered_paths = [repo_path / p.strip() for p in content.splitlines() if p.strip()]
 
-    if set(ordered_paths) - set(paths):
+    if not set(ordered_paths).issubset(frozenset(paths)):
+        ai.cache.evict(ai.last_cache_key)
         raise ValueError("Failed to order paths")
 
     return ordered_paths
 
 
 def pull_docs():
-    base_dir = os.path.dirname(__file__)
-    prompts_dir = os.path.join(base_dir, "prompts")
+    prompts_dir = prompts.prompts_dir()
+
+    # Fetch both docs concurrently; total time is the slower download
+    # instead of the sum of the two
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        cog_docs, predict_docs = executor.map(session.get, [COG_DOCS, PREDICT_DOCS])
 
-    cog_docs = requests.get(COG_DOCS)
     if cog_docs.status_code == 200:
         print("Successfully pulled down documentation for cog.yaml")
-        with open(os.path.join(prompts_dir, "cog_yaml_docs.tpl"), 'wb') as f:
+        with open(prompts_dir / "cog_yaml_docs.tpl", 'wb') as f:
             f.write(cog_docs.content)
     else:
         print("Failed to download cog.yaml documentation")
 
-    predict_docs = requests.get(PREDICT_DOCS)
     if predict_docs.status_code == 200:
         print("Successfully pulled down documentation for predict.py")
-        with open(os.path.join(prompts_dir, "cog_python_docs.tpl"), 'wb') as f:
+        with open(prompts_dir / "cog_python_docs.tpl", 'wb') as f:
             f.write(predict_docs.content)
     else:
         print("Failed to download predict.py documentation")
 
 
+def read_file(path: Path) -> str:
+    # One unbuffered whole-file read; decode with errors="replace" so a
+    # stray non-UTF-8 byte in a repo file doesn't crash the run
+    return path.read_bytes().decode("utf-8", errors="replace")
+
+
 def load_readme_contents(repo_path: Path) -> tuple[str, str] | tuple[None, None]:
     readme_filenames = ["README.md", "readme.md", "README.txt", "readme.txt", "README"]
     for filename in readme_filenames:
         readme_path = repo_path / filename
         if readme_path.exists():
-            return filename, readme_path.read_text()
+            return filename, read_file(readme_path)
     return None, None
 
 
 def get_packages_info(ai: AI, repo_path: Path):
     cog_yaml_path = repo_path / "cog.yaml"
     if cog_yaml_path.exists():
-        cog_yaml = cog_yaml_path.read_text()
+        cog_yaml = read_file(cog_yaml_path)
     else:
         cog_yaml = None
-    content = ai.call(prompts.get_packages(cog_contents=cog_yaml))
+    content = ai.call(prompts.get_packages(cog_contents=cog_yaml), temperature=0)
 
-    # Initialize PyPI client
-    client = PyPISimple()
-    # Get package information
-    package_info = {}
-    for package in content.strip().split('\n'):
+    # Initialize PyPI client on the shared pooled session so the
+    # per-package lookups reuse one keep-alive connection
+    client = PyPISimple(session=session)
+
+    def lookup_versions(package: str) -> tuple[bool, set]:
         valid = True
         versions = set()
         if '==' not in package:
@@ -112,8 +167,19 @@ def get_packages_info(ai: AI, repo_path: Path):
             # If version is explicitly given
             package_version = package.split('==')[1]
             versions.add(package_version)
-        if valid:
-            package_info[package] = sorted(versions, key=version.parse)
+        return valid, versions
+
+    # Query PyPI for the packages concurrently; a small pool overlaps the
+    # HTTPS round-trips without hammering the index. Blank lines in the
+    # model output would otherwise trigger pointless index lookups
+    packages = [package.strip() for package in content.split('\n') if package.strip()]
+    package_info = {}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for package, (valid, versions) in zip(
+            packages, executor.map(lookup_versions, packages)
+        ):
+            if valid:
+                package_info[package] = sorted(versions, key=version.parse)
     return package_info
 
 
@@ -128,7 +194,7 @@ def generate_initial(
 
     requirements_file = repo_path / "requirements.txt"
     if requirements_file.exists():
-        files["requirements.txt"] = requirements_file.read_text()
+        files["requirements.txt"] = read_file(requirements_file)
         package_versions = None
     else:
         print("Getting package information...")
@@ -136,19 +202,28 @@ def generate_initial(
 
     poetry_file = repo_path / "pyproject.toml"
     if poetry_file.exists():
-        files["pyproject.toml"] = poetry_file.read_text()
-
-    for path in paths:
-        files[path.name] = path.read_text()
+        files["pyproject.toml"] = read_file(poetry_file)
+
+    # Read the repo files concurrently; the GIL is released around disk IO.
+    # Skip files whose contents duplicate one we've already included
+    # (vendored copies, symlinked sources) to not waste prompt tokens
+    seen_digests = set()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for path, contents in zip(paths, executor.map(read_file, paths)):
+            digest = hashlib.blake2b(contents.encode()).digest()
+            if digest in seen_digests:
+                continue
+            seen_digests.add(digest)
+            files[path.name] = contents
 
     predict_py_path = repo_path / "predict.py"
     if predict_py_path.exists():
-        predict_py = predict_py_path.read_text()
+        predict_py = read_file(predict_py_path)
     else:
         predict_py = None
     cog_yaml_path = repo_path / "cog.yaml"
     if cog_yaml_path.exists():
-        cog_yaml = cog_yaml_path.read_text()
+        cog_yaml = read_file(cog_yaml_path)
     else:
         cog_yaml = None
 
@@ -157,54 +232,170 @@ def generate_initial(
             files=files, tell=tell, predict_py=predict_py, cog_yaml=cog_yaml, package_versions=package_versions
         )
     )
-    cog_yaml = file_from_gpt_response(content, "cog.yaml")
-    predict_py = file_from_gpt_response(content, "predict.py")
+    blocks = parse_files(content)
+    for filename in ["cog.yaml", "predict.py"]:
+        if filename not in blocks:
+            raise ValueError(f"Failed to generate {filename}")
 
-    return cog_yaml, predict_py
+    return blocks["cog.yaml"], blocks["predict.py"]
+
+
+IGNORE_DIRS = frozenset({
+    ".git",
+    ".cog",
+    ".venv",
+    "venv",
+    ".tox",
+    ".mypy_cache",
+    ".pytest_cache",
+    "node_modules",
+    "__pycache__",
+})
 
 
 def find_python_files(repo_path: Path) -> list[Path]:
-    python_files = [path for path in repo_path.rglob("*.py")]
+    # Inside a git repo the index already knows the file list with
+    # .gitignore applied; one git subprocess beats walking the tree
+    try:
+        out = subprocess.check_output(
+            [
+                "git",
+                "ls-files",
+                "-z",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+                "--",
+                "*.py",
+            ],
+            cwd=repo_path,
+            stderr=subprocess.DEVNULL,
+        )
+        paths = [repo_path / name for name in out.decode().split("\0") if name]
+        # Tracked files can be deleted from the working tree
+        return [path for path in paths if path.exists()]
+    except (subprocess.CalledProcessError, OSError):
+        pass
+
+    # os.scandir exposes file/directory types from the directory entries
+    # themselves, avoiding an extra stat call per path
+    python_files = []
+    stack = [repo_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORE_DIRS:
+                        stack.append(Path(entry.path))
+                elif entry.name.endswith(".py"):
+                    python_files.append(Path(entry.path))
     return python_files
 
 
-def file_from_gpt_response(content: str, filename: str) -> str:
-    pattern = re.compile(
-        rf"(?<={file_start(filename)})(?:\n```[a-z]*\n)?(.*?)(?:\n```\n)?(?={file_end(filename)})",
+ALL_FILES_PATTERN = re.compile(
+    rf"{re.escape(prompts.FILE_START)}(?P<name>[^\n]+)(?:\n```[a-z]*\n)?(?P<body>.*?)(?:\n```\n)?(?={re.escape(prompts.FILE_END)}(?P=name))",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+def parse_files(content: str) -> dict[str, str]:
+    return {
+        match["name"].strip(): match["body"].strip()
+        for match in ALL_FILES_PATTERN.finditer(content)
+    }
+
+
+@functools.lru_cache(maxsize=32)
+def file_pattern(filename: str) -> re.Pattern:
+    # re.escape also keeps regex metacharacters in filenames from being
+    # interpreted as part of the pattern
+    return re.compile(
+        rf"(?<={re.escape(file_start(filename))})(?:\n```[a-z]*\n)?(.*?)(?:\n```\n)?(?={re.escape(file_end(filename))})",
         re.MULTILINE | re.DOTALL,
     )
-    matches = pattern.search(content)
+
+
+def file_from_gpt_response(content: str, filename: str) -> str:
+    matches = file_pattern(filename).search(content)
     if not matches:
         raise ValueError(f"Failed to generate {filename}")
     return matches[1].strip()
 
 
+def write_file_atomic(file_path: Path, content: str):
+    # Skip the write entirely when the content is unchanged, e.g. when
+    # the model re-emits an identical file on a later attempt
+    data = content.encode()
+    if (
+        file_path.exists()
+        and hashlib.blake2b(file_path.read_bytes()).digest()
+        == hashlib.blake2b(data).digest()
+    ):
+        return
+
+    # Write to a temporary file in the same directory and rename it into
+    # place, so a crash mid-write can't leave a truncated file behind
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(data)
+        f.flush()
+        # One fdatasync before the rename makes the content durable
+        # without the full metadata flush of fsync; macOS has no
+        # fdatasync, so fall back to fsync there
+        getattr(os, "fdatasync", os.fsync)(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
 def write_files(repo_path: Path, files: dict):
     for filename, content in files.items():
-        file_path = repo_path / filename
-        file_path.write_text(content)
+        write_file_atomic(repo_path / filename, content)
+
+
+FAIL_PATTERN = re.compile(rb"Model setup failed|Traceback \(most recent call last\)")
 
 
 def run_cog_predict(repo_path: Path, predict_command: str) -> tuple[bool, str]:
     print(predict_command, file=sys.stderr)
 
+    # Split the command ourselves instead of shell=True: one fewer
+    # /bin/sh fork per attempt, and no shell interpretation of
+    # model-generated command strings
     proc = subprocess.Popen(
-        predict_command, cwd=repo_path, stderr=subprocess.PIPE, shell=True
+        shlex.split(predict_command), cwd=repo_path, stderr=subprocess.PIPE
     )
-    stderr = ""
+    # Read stderr in 64 KB chunks straight off the fd: no per-line
+    # readline/decode overhead, raw bytes passed through to our stderr,
+    # and a single decode at the end. Both failure markers are matched by
+    # one precompiled bytes pattern during streaming, so the accumulated
+    # output never needs a second full scan
+    buf = bytearray()
+    scan_offset = 0
+    traceback_seen = False
+    setup_failed = False
     assert proc.stderr
-    for line in proc.stderr:
-        line = line.decode()
-        sys.stderr.write(line)
-        stderr += line
-
-        if "Model setup failed" in line:
-            proc.kill()
+    fd = proc.stderr.fileno()
+    while not setup_failed:
+        chunk = os.read(fd, 65536)
+        if not chunk:
             break
+        buf.extend(chunk)
+        sys.stderr.buffer.write(chunk)
+        sys.stderr.flush()
+
+        for match in FAIL_PATTERN.finditer(buf, scan_offset):
+            if match[0] == b"Model setup failed":
+                proc.kill()
+                setup_failed = True
+                break
+            traceback_seen = True
+        # Resume scanning just before the chunk boundary so a marker
+        # split across two chunks is still found
+        scan_offset = max(0, len(buf) - 64)
 
     proc.wait()
+    stderr = buf.decode("utf-8", errors="replace")
     # cog predict will return 0 if the model fails internally
-    if proc.returncode == 0 and "Traceback (most recent call last)" not in stderr:
+    if proc.returncode == 0 and not traceback_seen:
         return True, stderr
 
     return False, stderr
@@ -221,38 +412,66 @@ def cog_predict_from_gpt_response(content: str) -> str:
     return matches[1].strip()
 
 
+FILE_INPUT_PATTERN = re.compile(r"@([\w.]+)")
+
+
 def create_files_for_predict_command(repo_path: Path, predict_command: str) -> str:
     print("Parsing predict command...")
     predict_command = cog_predict_from_gpt_response(predict_command)
-    file_inputs = re.findall(r"@([\w.]+)", predict_command)
+    file_inputs = FILE_INPUT_PATTERN.findall(predict_command)
 
+    missing_paths = []
     for filename in file_inputs:
         if not os.path.exists(filename):
             tmp_path = os.path.join("/tmp", os.path.basename(filename))
             predict_command = predict_command.replace("@" + filename, "@" + tmp_path)
-            create_empty_file(repo_path, tmp_path)
+            missing_paths.append(tmp_path)
+
+    # Create the placeholder files concurrently; image encoding and blob
+    # copies are independent of each other
+    if missing_paths:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _ in executor.map(
+                lambda tmp_path: create_empty_file(repo_path, tmp_path), missing_paths
+            ):
+                pass
 
     return predict_command
 
 
 def parse_cog_predict_error(stderr: str, *, max_length=20000) -> str:
-    if "Running prediction...\n" in stderr:
-        error = stderr.split("Running prediction...\n")[1].split("panic: ")[0]
-    else:
-        error = stderr.split("panic: ")[0]
-
-    return error[-max_length:]
+    marker = "Running prediction...\n"
+    i = stderr.find(marker)
+    start = i + len(marker) if i != -1 else 0
+    j = stderr.find("panic: ", start)
+    end = j if j != -1 else len(stderr)
+    return stderr[start:end][-max_length:]
 
 
 @retry(5)
 def diagnose_error(ai: AI, predict_command: str, error: str) -> str:
     print("Diagnosing source of error: ", file=sys.stderr)
 
-    diagnose_text = ai.call(prompts.diagnose_error(predict_command=predict_command, error=truncate_error(error)))
-    package_error = ai.call(prompts.package_error(predict_command=predict_command, error=truncate_error(error)))
-    package_error = package_error == "True"
+    # Both the error source and the package question are answered in a
+    # single call to halve the number of round-trips per failed attempt.
+    # Classification is deterministic, so temperature 0 lets the cache
+    # answer repeat diagnoses of the same error. A cached response that
+    # fails validation is evicted before raising so the next run doesn't
+    # replay it; the retry itself isn't pinned either way, because the
+    # failed exchange lands in the chat history and changes the key
+    content = ai.call(
+        prompts.diagnose_error(predict_command=predict_command, error=truncate_error(error)),
+        temperature=0,
+    )
+    lines = [line.strip() for line in content.strip().splitlines() if line.strip()]
+    if len(lines) != 2:
+        ai.cache.evict(ai.last_cache_key)
+        raise ValueError("Failed to diagnose error")
+    diagnose_text, package_error_text = lines
+    package_error = package_error_text == "True"
 
     if diagnose_text not in [ERROR_PREDICT_PY, ERROR_COG_PREDICT, ERROR_COG_YAML]:
+        ai.cache.evict(ai.last_cache_key)
         raise ValueError("Failed to diagnose error")
     return diagnose_text, package_error
 
@@ -333,9 +552,16 @@ def autocog(
     initialize: bool,
 ):
     repo_path = repo or Path(os.getcwd())
-    pull_docs()
+    # Render the system prompt before the download starts: it includes
+    # the docs templates, which pull_docs rewrites in place, and must not
+    # read a half-written file. The refreshed docs are picked up on the
+    # next run; the download happens in the background while the initial
+    # LLM calls are in flight
+    system_prompt = prompts.system
+    docs_thread = threading.Thread(target=pull_docs)
+    docs_thread.start()
     ai = AI(
-        system_prompt=prompts.system,
+        system_prompt=system_prompt,
         provider=ai_provider,
         api_key=api_key,
         chat_history_path=repo_path / "autocog.chat",
@@ -344,9 +570,11 @@ def autocog(
     if initialize:
         initialize_project(ai, repo_path)
 
-    cog_yaml_exists = (repo_path / "cog.yaml").exists()
-    predict_py_exists = (repo_path / "predict.py").exists()
-    chat_history_exists = ai.chat_history_path.exists()
+    with os.scandir(repo_path) as entries:
+        existing_filenames = {entry.name for entry in entries}
+    cog_yaml_exists = "cog.yaml" in existing_filenames
+    predict_py_exists = "predict.py" in existing_filenames
+    chat_history_exists = ai.chat_history_path.name in existing_filenames
 
     if chat_history_exists and (not cog_yaml_exists or not predict_py_exists):
         raise ValueError(
@@ -358,13 +586,14 @@ def autocog(
     else:
         paths = order_paths(ai, repo_path)
         cog_yaml, predict_py = generate_initial(ai, repo_path, paths=paths, tell=tell)
-        (repo_path / "cog.yaml").write_text(cog_yaml)
-        (repo_path / "predict.py").write_text(predict_py)
+        write_file_atomic(repo_path / "cog.yaml", cog_yaml)
+        write_file_atomic(repo_path / "predict.py", predict_py)
 
     if not predict_command:
         predict_command = ai.call(prompts.cog_predict)
 
     predict_command = create_files_for_predict_command(repo_path, predict_command)
+    docs_thread.join()
     for attempt in range(attempts):
         print("Predict command")
         print(predict_command)
@@ -392,10 +621,10 @@ def autocog(
 
         if error_source == ERROR_PREDICT_PY:
             predict_py = fix_predict_py(ai)
-            (repo_path / "predict.py").write_text(predict_py)
+            write_file_atomic(repo_path / "predict.py", predict_py)
         elif error_source == ERROR_COG_YAML:
             cog_yaml = fix_cog_yaml(ai)
-            (repo_path / "cog.yaml").write_text(cog_yaml)
+            write_file_atomic(repo_path / "cog.yaml", cog_yaml)
         elif error_source == ERROR_COG_PREDICT:
             predict_command = ai.call(prompts.cog_predict)
             predict_command = create_files_for_predict_command(
@@ -0,0 +1,90 @@
+import atexit
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import orjson
+
+# Callers don't need the write acknowledged before using the response, so
+# disk writes happen on a single background thread, drained at exit
+_write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-write")
+atexit.register(_write_pool.shutdown)
+
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "autocog" / "llm"
+)
+
+
+def cache_key(
+    model: str,
+    system_prompt: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "system_prompt": system_prompt,
+            "messages": messages,
+            "temperature": temperature,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Cache:
+    """Disk cache for LLM responses, keyed on the full request.
+
+    Only deterministic (temperature == 0) calls are cached; at higher
+    temperatures retries are supposed to produce different outputs, so
+    returning a cached response would defeat the retry loops.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        # In-process memo above the disk cache, so repeat lookups in the
+        # same run don't re-read and re-parse the record
+        self.memo: Dict[str, str] = {}
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def lookup(self, key: str, temperature: float) -> Optional[str]:
+        if temperature > 0:
+            return None
+        if key in self.memo:
+            return self.memo[key]
+        path = self.path(key)
+        if not path.exists():
+            return None
+        response = orjson.loads(path.read_bytes())["response"]
+        self.memo[key] = response
+        return response
+
+    def store(self, key: str, temperature: float, response: str):
+        if temperature > 0:
+            return
+        self.memo[key] = response
+        _write_pool.submit(self._store_sync, key, response)
+
+    def evict(self, key: str):
+        self.memo.pop(key, None)
+        # Route the unlink through the write pool so it is ordered after
+        # any still-pending store for the same key
+        _write_pool.submit(self._evict_sync, key)
+
+    def _evict_sync(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+    def _store_sync(self, key: str, response: str):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename into place so a concurrent run
+        # can never read a partially written record
+        path = self.path(key)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(orjson.dumps({"response": response}))
+        os.replace(tmp_path, path)
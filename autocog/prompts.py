@@ -1,3 +1,4 @@
+import functools
 import os
 from pathlib import Path
 from jinja2 import nodes, Environment, FileSystemLoader
@@ -34,14 +35,25 @@ class FileEndExtension(Extension):
         return nodes.Output([nodes.TemplateData(FILE_END), filename]).set_lineno(lineno)
 
 
-def render(template_name, **kwargs):
+@functools.lru_cache(maxsize=1)
+def prompts_dir() -> Path:
     current_dir = Path(os.path.dirname(os.path.abspath(__file__)))
-    prompts_dir = current_dir / "prompts"
-    env = Environment(
-        loader=FileSystemLoader(prompts_dir),
+    return current_dir / "prompts"
+
+
+@functools.lru_cache(maxsize=1)
+def environment() -> Environment:
+    # One Environment for the process so templates are parsed and
+    # compiled once; auto_reload stays on (the default) because
+    # pull_docs rewrites the docs templates at runtime
+    return Environment(
+        loader=FileSystemLoader(prompts_dir()),
         extensions=[FileStartExtension, FileEndExtension],
     )
-    template = env.get_template(template_name + ".tpl")
+
+
+def render(template_name, **kwargs):
+    template = environment().get_template(template_name + ".tpl")
 
     kwargs["command_end"] = COMMAND_END
     kwargs["command_start"] = COMMAND_START
@@ -77,10 +89,6 @@ def diagnose_error(predict_command: str, error: str) -> str:
     return render("diagnose_error", predict_command=predict_command, error=error)
 
 
-def package_error(predict_command: str, error: str) -> str:
-    return render("package_error", predict_command=predict_command, error=error)
-
-
 def get_packages(cog_contents: str | None) -> str:
     return render("get_packages", cog_contents=cog_contents)
 
@@ -89,10 +97,18 @@ def get_packages_versions(packages: str | None) -> str:
     return render("get_packages_versions", packages=packages)
 
 
-system = render("system")
-cog_predict = render("cog_predict")
-fix_predict_py = render("fix_predict_py")
-fix_cog_yaml = render("fix_cog_yaml")
+# The static prompts are rendered lazily on first attribute access
+# (PEP 562) so importing the package doesn't pay for compiling every
+# template up front
+STATIC_PROMPTS = frozenset({"system", "cog_predict", "fix_predict_py", "fix_cog_yaml"})
+
+
+def __getattr__(name):
+    if name in STATIC_PROMPTS:
+        value = render(name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def file_start(filename):
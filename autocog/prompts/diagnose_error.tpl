@@ -2,4 +2,9 @@ The command {{ predict_command }} returned the following error:
 
 {{ error }}
 
-Given the predict.py and cog.yaml files above, diagnose whether the error occurred because of an error in predict.py, an error in cog.yaml, or an error in the cog predict command. Only output the string {{ ERROR_COG_PREDICT }} or {{ ERROR_PREDICT_PY }} or {{ ERROR_COG_YAML }}. Don't output anything else since I intend to parse the output and use it in a programmatic pipeline.
+Given the predict.py and cog.yaml files above, diagnose the error and answer the following two questions:
+
+1. Did the error occur because of an error in predict.py, an error in cog.yaml, or an error in the cog predict command? Answer with the string {{ ERROR_COG_PREDICT }} or {{ ERROR_PREDICT_PY }} or {{ ERROR_COG_YAML }}.
+2. Does the error have to do with a package dependency issue? Some examples of a package dependency issue are no matching distribution found or resolution impossible. Answer "True" if it is a package dependency issue, "False" if not.
+
+Output the two answers on two separate lines, the answer to question 1 on the first line and the answer to question 2 on the second line. Don't output anything else since I intend to parse the output and use it in a programmatic pipeline.
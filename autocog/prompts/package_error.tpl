@@ -1,5 +0,0 @@
-The command {{ predict_command }} returned the following error:
-
-{{ error }}
-
-Parse the errror from the stack trace. Does it have to do with a package dependency issue? Some examples of a package dependency issue are no matching distribution found or resolution impossible. If it is a package dependency issue, output "True". If not, output "False". Don't output anything else since I intend to parse the output and use it in a programmatic pipeline.
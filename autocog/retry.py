@@ -1,6 +1,16 @@
+import random
 import sys
+import time
 import functools
 
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+BACKOFF_JITTER = 1.0
+
+# HTTP status codes that won't be fixed by retrying, e.g. bad requests
+# and invalid API keys
+PERMANENT_STATUS_CODES = [400, 401, 403, 404]
+
 
 def retry(attempts=3):
     def decorator_retry(func):
@@ -11,8 +21,16 @@ def retry(attempts=3):
                     return func(*args, **kwargs)
                 except Exception as e:
                     print(f"Exception occurred: {e}", file=sys.stderr)
+                    if getattr(e, "status_code", None) in PERMANENT_STATUS_CODES:
+                        print("Error is permanent, not retrying", file=sys.stderr)
+                        raise
                     if attempt < attempts:
-                        print(f"Retrying attempt {attempt}/{attempts}", file=sys.stderr)
+                        backoff = backoff_seconds(attempt)
+                        print(
+                            f"Retrying attempt {attempt}/{attempts} in {backoff:.1f} seconds",
+                            file=sys.stderr,
+                        )
+                        time.sleep(backoff)
                     else:
                         print(f"Giving up after {attempts} attempts", file=sys.stderr)
                         raise
@@ -20,3 +38,7 @@ def retry(attempts=3):
         return wrapper_retry
 
     return decorator_retry
+
+
+def backoff_seconds(attempt: int) -> float:
+    return min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)) + random.random() * BACKOFF_JITTER
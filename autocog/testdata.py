@@ -1,14 +1,18 @@
+import os
+import shutil
 from pathlib import Path
 
 import wave
 import array
-from PIL import Image
-from pydub import AudioSegment
-import cv2
-import numpy as np
+
+DATA_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / "data"
 
 
 def create_empty_file(repo_path: Path, filename: str):
+    # Import PIL lazily so every CLI invocation doesn't pay its import
+    # cost when no placeholder image is needed
+    from PIL import Image
+
     file_type = filename.split(".")[-1]
     path = repo_path / filename
     if file_type == "jpg":
@@ -23,26 +27,17 @@ def create_empty_file(repo_path: Path, filename: str):
             data = array.array("h", [0] * 44100 * 2)  # 'h' is for signed short integers
             wav_file.writeframes(data.tobytes())
     elif file_type == "mp3":
-        silence = AudioSegment.silent(duration=1000)  # duration in milliseconds
-        silence.export(path, format="mp3")
+        # Pre-generated one second of silence; copying bytes avoids
+        # shelling out to ffmpeg through pydub
+        shutil.copyfile(DATA_DIR / "silence.mp3", path)
     elif file_type == "txt":
         with open(path, "w") as txt_file:
             txt_file.write("   ")
     elif file_type == "mp4":
-        height, width = 640, 480
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        video = cv2.VideoWriter(str(path), fourcc, 1, (width, height))
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        for _ in range(30):
-            video.write(frame)
-        video.release()
+        # Pre-generated 30 black 640x480 frames; copying bytes avoids
+        # importing OpenCV and encoding a video per placeholder
+        shutil.copyfile(DATA_DIR / "blank.mp4", path)
     elif file_type == "avi":
-        height, width = 640, 480
-        fourcc = cv2.VideoWriter_fourcc(*"XVID")
-        video = cv2.VideoWriter(str(path), fourcc, 1, (width, height))
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
-        for _ in range(30):
-            video.write(frame)
-        video.release()
+        shutil.copyfile(DATA_DIR / "blank.avi", path)
     else:
         raise ValueError("Unsupported file type")
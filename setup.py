@@ -1,33 +1,17 @@
-from setuptools import setup, find_packages
+from setuptools import setup
 from pathlib import Path
 
+# Everything static lives in pyproject.toml; this shim only supplies the
+# long description, which needs the screen recording stripped out
 this_directory = Path(__file__).parent
-long_description = (this_directory / "README.md").read_text()
-long_description = long_description.replace("![Screen recording](https://github.com/andreasjansson/AutoCog/raw/main/assets/screen-recording.gif)\n", "")
+long_description = (
+    (this_directory / "README.md")
+    .read_bytes()
+    .replace(b"![Screen recording](https://github.com/andreasjansson/AutoCog/raw/main/assets/screen-recording.gif)\n", b"")
+    .decode("utf-8")
+)
 
 setup(
-    name="autocog",
     long_description=long_description,
     long_description_content_type="text/markdown",
-    version="0.0.11",
-    url="https://github.com/andreasjansson/AutoCog",
-    packages=find_packages(),
-    install_requires=[
-        "openai",
-        "click",
-        "Pillow",
-        "pydub",
-        "opencv-python",
-        "anthropic",
-        "jinja2",
-        "pypi-simple"
-    ],
-    entry_points={
-        "console_scripts": [
-            "autocog = autocog.autocog:autocog",
-        ],
-    },
-    package_data={
-        "autocog": ["prompts/*.tpl"],
-    },
 )